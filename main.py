@@ -1,7 +1,12 @@
-import os, time, json, re, threading
-import requests, feedparser
+import os, time, re, threading, queue, random
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+import orjson   # 2-5x plus rapide que json stdlib (parse + dump), sortie en bytes
+import requests
+# fastfeedparser = parseur XML natif (lxml), API compatible feedparser, ~10-50x plus rapide
+import fastfeedparser as feedparser
 from datetime import datetime
-import pytz
+from zoneinfo import ZoneInfo
 from dotenv import load_dotenv
 
 # ================== CONFIG ==================
@@ -14,7 +19,7 @@ POLL_SECONDS = int(os.getenv("POLL_SECONDS", "300"))   # 300 = 5 min (met 900 po
 if not TOKEN:
     raise RuntimeError("TELEGRAM_TOKEN manquant. Définis-le dans les variables d'environnement.")
 
-TZ = pytz.timezone("Europe/Paris")
+TZ = ZoneInfo("Europe/Paris")
 
 ASSETS = ["BTC","ADA","ETH","SOL","LINK","AVAX"]
 CG_IDS = {
@@ -50,6 +55,16 @@ USER_ALERTS = {
     }
 }
 
+# Tri des seuils une fois à l'import : warn_up/break_even décroissants, danger_down
+# croissant => check_user_levels n'annonce que le niveau le plus strict franchi
+# et s'arrête dès qu'il l'a trouvé
+for _cfg in USER_ALERTS.values():
+    for _k in ("warn_up", "break_even"):
+        if _cfg.get(_k):
+            _cfg[_k] = tuple(sorted(_cfg[_k], reverse=True))
+    if _cfg.get("danger_down"):
+        _cfg["danger_down"] = tuple(sorted(_cfg["danger_down"]))
+
 # Sources officielles + niches (RSS). X/Twitter non inclus (API requise).
 FEEDS = {
     "BTC":[
@@ -94,130 +109,361 @@ KW_BUY  = ["etf","listing","listed","partnership","partenariat","integration","u
            "mainnet","testnet","adoption","institutional","scalability","roadmap","regulation","approval"]
 KW_SELL = ["hack","exploit","security breach","breach","lawsuit","ban","delist","delisting","halted withdrawals"]
 
+# Regex précompilées (une alternation = un seul scan C par texte,
+# au lieu de ~25 recherches de sous-chaînes en Python par article)
+KW_BUY_RE  = re.compile("|".join(map(re.escape, KW_BUY)))
+KW_SELL_RE = re.compile("|".join(map(re.escape, KW_SELL)))
+
+# Même principe pour la crédibilité : une regex par palier, testées dans l'ordre
+CRED_TIERS = [
+    (re.compile("|".join(map(re.escape,
+        ["blog.ethereum.org","iohk.io","essentialcardano.io","solana.com",
+         "blog.chain.link","avalancheavax","mempool.space","bitcoin.org"]))),
+     "High (official)"),
+    (re.compile("|".join(map(re.escape,
+        ["coindesk.com","cointelegraph.com","theblock.co","reuters.com","bloomberg.com"]))),
+     "Medium-High (journalistic)"),
+    (re.compile("|".join(map(re.escape, ["kraken.com","coinbase.com","binance.com"]))),
+     "Medium-High (exchange)"),
+    (re.compile("|".join(map(re.escape, ["sec.gov","cftc.gov"]))),
+     "High (regulator)"),
+]
+
 SEEN_ITEMS_FILE   = "seen_items.json"
+SEEN_ITEMS_LOG    = "seen_items.log"   # journal append-only des nouvelles clés entre compactions
+FEED_META_FILE    = "feed_meta.json"   # ETag / Last-Modified par flux (GET conditionnel)
 SEEN_TARGETS_FILE = "seen_targets.json"
+SEEN_LEVELS_FILE  = "seen_levels.json"  # niveaux USER_ALERTS déjà signalés (anti-spam)
 PRED_FILE         = "predictions.json"
 LAST_UPDATE_ID_FILE = "last_update_id.json"  # pour les commandes Telegram (getUpdates)
 
 # ================== HELPERS ==================
+# horodatage mémoïsé 1s : une rafale d'alertes réutilise la même chaîne formatée
+# au lieu de refaire datetime.now + strftime à chaque message
+_ts_cache = [0.0, ""]
+
 def now_paris():
-    return datetime.now(TZ).strftime("%Y-%m-%d %H:%M:%S %Z")
+    now = time.time()
+    if now - _ts_cache[0] > 1:
+        _ts_cache[:] = [now, datetime.now(TZ).strftime("%Y-%m-%d %H:%M:%S %Z")]
+    return _ts_cache[1]
 
 def load_json(path, default):
     try:
         if os.path.exists(path):
-            with open(path, "r", encoding="utf-8") as f:
-                return json.load(f)
+            with open(path, "rb") as f:
+                return orjson.loads(f.read())
     except:
         pass
     return default
 
 def save_json(path, data):
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    with open(path, "wb") as f:
+        f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+
+# ---- Persistance des items déjà vus ----
+# Un set en mémoire + un journal append-only : on n'écrit que la nouvelle clé
+# au lieu de réécrire tout le JSON (qui grossit sans borne) à chaque tick.
+SEEN_MAX          = 10000   # plafond de clés conservées à la compaction
+SEEN_COMPACT_EVERY = 12     # compaction ~1x/heure avec POLL_SECONDS=300
+
+def load_seen():
+    # compat ancien format : dict {key: True}
+    data = load_json(SEEN_ITEMS_FILE, [])
+    seen = set(data if isinstance(data, list) else data.keys())
+    try:
+        if os.path.exists(SEEN_ITEMS_LOG):
+            with open(SEEN_ITEMS_LOG, "r", encoding="utf-8") as f:
+                seen.update(line.strip() for line in f if line.strip())
+    except:
+        pass
+    return seen
+
+def mark_seen(seen, key):
+    seen.add(key)
+    try:
+        with open(SEEN_ITEMS_LOG, "a", encoding="utf-8") as f:
+            f.write(key + "\n")
+    except Exception as e:
+        print("seen log error:", e)
+
+def compact_seen(seen):
+    # borne le set, réécrit le JSON une fois, puis tronque le journal
+    if len(seen) > SEEN_MAX:
+        seen.difference_update(sorted(seen)[:-SEEN_MAX])
+    save_json(SEEN_ITEMS_FILE, sorted(seen))
+    try:
+        open(SEEN_ITEMS_LOG, "w").close()
+    except:
+        pass
 
 def credibility(url):
-    if any(s in url for s in ["blog.ethereum.org","iohk.io","essentialcardano.io","solana.com","blog.chain.link","avalancheavax","mempool.space","bitcoin.org"]):
-        return "High (official)"
-    if any(s in url for s in ["coindesk.com","cointelegraph.com","theblock.co","reuters.com","bloomberg.com"]):
-        return "Medium-High (journalistic)"
-    if any(s in url for s in ["kraken.com","coinbase.com","binance.com"]):
-        return "Medium-High (exchange)"
-    if any(s in url for s in ["sec.gov","cftc.gov"]):
-        return "High (regulator)"
+    for rx, label in CRED_TIERS:
+        if rx.search(url):
+            return label
     return "Medium"
 
+# Les URLs de flux sont fixes : crédibilité précalculée une fois à l'import.
+# Pour les groupes agrégateurs, le lien de l'article pointe vers un site tiers,
+# on re-classe donc l'article au cas par cas.
+AGGREGATOR_GROUPS = {"_global", "exchanges", "regulators"}
+FEED_URL_CRED = {url: credibility(url) for urls in FEEDS.values() for url in urls}
+
+# Envois Telegram découplés du scheduler : une file + un thread dédié qui réutilise
+# une même Session (keep-alive), au lieu d'un handshake TCP+TLS bloquant par message
+_tg_session = requests.Session()
+_tg_queue   = queue.Queue()
+
+def _tg_worker():
+    while True:
+        chat_id, text = _tg_queue.get()
+        try:
+            _tg_session.post(
+                f"https://api.telegram.org/bot{TOKEN}/sendMessage",
+                data={"chat_id": chat_id, "text": text, "parse_mode":"HTML", "disable_web_page_preview": False},
+                timeout=20
+            )
+        except Exception as e:
+            print("Telegram error:", e)
+        finally:
+            _tg_queue.task_done()
+
+threading.Thread(target=_tg_worker, daemon=True).start()
+
 def send(chat_id, text):
-    try:
-        requests.post(
-            f"https://api.telegram.org/bot{TOKEN}/sendMessage",
-            data={"chat_id": chat_id, "text": text, "parse_mode":"HTML", "disable_web_page_preview": False},
-            timeout=20
-        )
-    except Exception as e:
-        print("Telegram error:", e)
+    _tg_queue.put((chat_id, text))
+
+# Les alertes du scheduler sont agrégées par tick : N articles/niveaux => ~1 sendMessage
+# au lieu de N allers-retours API (les réponses aux commandes restent immédiates via send)
+_batch      = {}    # chat_id -> [textes en attente]
+_batch_lock = threading.Lock()
+BATCH_SEP   = "\n\n———\n\n"
+BATCH_MAX   = 4000  # marge sous la limite Telegram de 4096 caractères
 
 def broadcast(text, fallback_chat_id=None):
-    # envoie à CHAT_ID_DEFAULT si défini, sinon à fallback_chat_id (issu d'une commande)
+    # accumule pour _flush_batch ; cible CHAT_ID_DEFAULT si défini, sinon le chat de la commande
     target = CHAT_ID_DEFAULT or fallback_chat_id
     if target:
-        send(target, text)
-
-def get_prices():
-    ids = ",".join(CG_IDS[a] for a in ASSETS)
-    url = f"https://api.coingecko.com/api/v3/simple/price?ids={ids}&vs_currencies=usd,eur"
+        with _batch_lock:
+            _batch.setdefault(target, []).append(text)
+
+def _flush_batch():
+    with _batch_lock:
+        pending = dict(_batch)
+        _batch.clear()
+    for chat_id, texts in pending.items():
+        chunk = ""
+        for t in texts:
+            if chunk and len(chunk) + len(BATCH_SEP) + len(t) > BATCH_MAX:
+                send(chat_id, chunk)
+                chunk = t
+            else:
+                chunk = f"{chunk}{BATCH_SEP}{t}" if chunk else t
+        if chunk:
+            send(chat_id, chunk)
+
+# Session partagée pour les APIs REST (CoinGecko, CryptoPanic) : keep-alive + pool
+# de connexions, un seul client réutilisé au lieu d'une connexion TLS par appel
+_api_session = requests.Session()
+
+# Cache TTL pour CoinGecko : le scheduler + les commandes (/status, /news...) partagent
+# la même réponse pendant 30s au lieu de refaire un appel HTTP à chaque fois (rate-limit)
+PRICE_CACHE_TTL = 30
+_price_cache = {"t": 0, "data": {}}
+_price_lock  = threading.Lock()
+
+# Taux EUR/USD rafraîchi au plus 1x/heure : on ne demande plus que l'USD à CoinGecko
+# (moitié moins d'octets, moins de pression rate-limit) et on dérive l'EUR côté client
+FX_CACHE_TTL = 3600
+_fx_cache = {"t": 0, "rate": None}
+
+def get_eur_rate():
+    if time.time() - _fx_cache["t"] < FX_CACHE_TTL and _fx_cache["rate"]:
+        return _fx_cache["rate"]
     try:
-        r = requests.get(url, timeout=20)
+        r = _api_session.get("https://api.exchangerate.host/latest?base=USD&symbols=EUR", timeout=20)
         if r.status_code==200:
-            return r.json()
+            body = r.json()
+            rate = body.get("rates", {}).get("EUR")
+            # l'API répond désormais {"success": false} en HTTP 200 sans access_key
+            if body.get("success") is False or not rate:
+                if not _fx_cache.get("warned"):
+                    print("FX error: pas de taux EUR dans la réponse (access_key requis ?) — fallback CoinGecko")
+                    _fx_cache["warned"] = True
+            else:
+                _fx_cache["t"]    = time.time()
+                _fx_cache["rate"] = rate
     except Exception as e:
-        print("Price error:", e)
-    return {}
+        print("FX error:", e)
+    return _fx_cache["rate"]
+
+def get_prices():
+    with _price_lock:
+        if time.time() - _price_cache["t"] < PRICE_CACHE_TTL and _price_cache["data"]:
+            return _price_cache["data"]
+        ids = ",".join(CG_IDS[a] for a in ASSETS)
+        # sans taux FX on redemande l'EUR à CoinGecko plutôt que de perdre le champ
+        rate = get_eur_rate()
+        vs   = "usd" if rate else "usd,eur"
+        url = f"https://api.coingecko.com/api/v3/simple/price?ids={ids}&vs_currencies={vs}"
+        try:
+            r = _api_session.get(url, timeout=20)
+            if r.status_code==200:
+                data = r.json()
+                if rate:
+                    for px in data.values():
+                        if px.get("usd") is not None:
+                            px["eur"] = px["usd"] * rate
+                _price_cache["t"]    = time.time()
+                _price_cache["data"] = data
+                return _price_cache["data"]
+        except Exception as e:
+            print("Price error:", e)
+        return {}
 
 def norm(s):
     return re.sub(r"\s+"," ", (s or "")).strip()
 
-def detect_asset(title, summary):
-    t = f"{title} {summary}".lower()
-    if "bitcoin" in t or "btc" in t: return "BTC"
-    if "cardano" in t or "ada" in t: return "ADA"
-    if "ethereum" in t or "eth" in t: return "ETH"
-    if "solana" in t or "sol " in t or t.endswith(" sol"): return "SOL"
-    if "chainlink" in t or "link" in t: return "LINK"
-    if "avalanche" in t or "avax" in t: return "AVAX"
-    return None
-
-def classify_action(title, summary):
-    txt = f"{title} {summary}".lower()
-    if any(k in txt for k in KW_SELL):
+# Un seul scan C avec groupes nommés au lieu de 6 recherches Python successives ;
+# les \b évitent aussi les faux positifs du genre "link" dans "linkedin"
+ASSET_RE = re.compile(
+    r"\b(?P<BTC>bitcoin|btc)\b|\b(?P<ADA>cardano|ada)\b|\b(?P<ETH>ethereum|eth)\b"
+    r"|\b(?P<SOL>solana|sol)\b|\b(?P<LINK>chainlink|link)\b|\b(?P<AVAX>avalanche|avax)\b",
+    re.I
+)
+
+def detect_asset(text_low):
+    # text_low : "titre + résumé" déjà passé en minuscules par l'appelant
+    m = ASSET_RE.search(text_low)
+    return m.lastgroup if m else None
+
+def classify_action(text_low):
+    if KW_SELL_RE.search(text_low):
         return "Prendre des profits / Réduire", "Signal négatif (sécurité/régulation)."
-    if any(k in txt for k in KW_BUY):
+    if KW_BUY_RE.search(text_low):
         return "Acheter +", "Catalyseur haussier (ETF/listing/upgrade/adoption)."
     return "Hold", "Pas de catalyseur clair."
 
 # ================== NEWS SCAN ==================
+# Cache court des flux parsés : une rafale de /news réutilise le dernier fetch (<60s)
+# au lieu de re-télécharger et re-parser les ~16 flux ; le scheduler (tick 300s)
+# rafraîchit toujours. Sert aussi de dernière version connue quand un flux répond 304.
+FEED_CACHE_TTL = 60
+_feed_cache = {}    # url -> (timestamp, feed parsé)
+
+# Session dédiée aux flux : keep-alive entre les ~16 fetches d'un même tick
+# (plusieurs flux partagent le même hôte) + compression explicite du XML
+_feed_session = requests.Session()
+_feed_session.headers["Accept-Encoding"] = "gzip, deflate, br"
+
+def _spread_by_host(pairs):
+    # mélange puis round-robin par hôte : on évite d'envoyer plusieurs requêtes
+    # consécutives au même domaine (files d'attente serveur, rate-limit) et on
+    # maximise le nombre d'hôtes distincts attaqués en parallèle
+    random.shuffle(pairs)
+    by_host = {}
+    for p in pairs:
+        by_host.setdefault(urlparse(p[1]).netloc, []).append(p)
+    out = []
+    while by_host:
+        for host in list(by_host):
+            out.append(by_host[host].pop())
+            if not by_host[host]:
+                del by_host[host]
+    return out
+
+def fetch_all_feeds():
+    # télécharge tous les flux en parallèle (le temps total = le flux le plus lent,
+    # au lieu de la somme des latences) ; le traitement reste séquentiel ensuite
+    all_urls = _spread_by_host([(group, url) for group, urls in FEEDS.items() for url in urls])
+    meta = load_json(FEED_META_FILE, {})
+
+    def fetch(pair):
+        group, url = pair
+        try:
+            now = time.time()
+            cached = _feed_cache.get(url)
+            if cached and now - cached[0] < FEED_CACHE_TTL:
+                return group, url, cached[1]
+            # GET conditionnel : si le serveur répond 304, rien de neuf => ni download ni parse.
+            # Seulement si on a une copie parsée à resservir : après un restart le cache est
+            # vide, un 304 ne donnerait rien à afficher pour /news => premier fetch complet.
+            headers = {}
+            if cached:
+                m = meta.get(url, {})
+                if m.get("etag"):     headers["If-None-Match"] = m["etag"]
+                if m.get("modified"): headers["If-Modified-Since"] = m["modified"]
+            r = _feed_session.get(url, headers=headers, timeout=20)
+            if r.status_code == 304:
+                # on ressert la dernière version parsée (utile pour /news)
+                _feed_cache[url] = (now, cached[1])
+                return group, url, cached[1]
+            if r.status_code != 200:
+                return group, url, None
+            meta[url] = {"etag": r.headers.get("ETag"), "modified": r.headers.get("Last-Modified")}
+            feed = feedparser.parse(r.content)
+            _feed_cache[url] = (now, feed)
+            return group, url, feed
+        except Exception:
+            return group, url, None
+
+    with ThreadPoolExecutor(max_workers=16) as ex:
+        results = list(ex.map(fetch, all_urls))
+    save_json(FEED_META_FILE, meta)
+    return results
+
 def scan_feeds(seen, prices, fallback_chat_id=None):
-    for group, urls in FEEDS.items():
-        for url in urls:
-            try:
-                feed = feedparser.parse(url)
-            except Exception:
+    for group, url, feed in fetch_all_feeds():
+        if feed is None:
+            continue
+        for e in feed.entries[:10]:
+            uid = e.get("id") or e.get("link") or e.get("title")
+            if not uid:
+                continue
+            key = f"{group}:{uid}"
+            if key in seen:
+                # flux RSS antichronologiques : tout ce qui suit une entrée déjà vue
+                # l'est aussi => on coupe, et on évite detect/classify/credibility
+                # sur le reste. Garde-fou : seulement si le flux est daté.
+                if e.get("published"):
+                    break
                 continue
-            for e in feed.entries[:10]:
-                uid = e.get("id") or e.get("link") or e.get("title")
-                if not uid:
-                    continue
-                key = f"{group}:{uid}"
-                if key in seen:
-                    continue
-
-                title   = norm(e.get("title"))
-                link    = e.get("link","")
-                summary = norm(e.get("summary") or e.get("description") or "")
-                target  = group if group not in ["_global","exchanges","regulators"] else detect_asset(title, summary)
-
-                # Si global/exchanges/regulators sans actif détecté => on pousse quand même (info générale)
-                asset_label = target if target else group
-
-                cg_id = CG_IDS.get(target) if target else None
-                eur = usd = None
-                if cg_id:
-                    px = prices.get(cg_id, {})
-                    eur = px.get("eur")
-                    usd = px.get("usd")
-
-                action, why = classify_action(title, summary)
-                cred        = credibility(link)
-                price_line  = f"Prix: {eur:.2f} € / ${usd:.2f}" if (eur and usd) else "Prix: n/a"
 
-                msg = (
-                    f"📰 <b>{asset_label}</b> — {now_paris()}\n"
-                    f"<b>{title}</b>\n{link}\n"
-                    f"{price_line}\n\n"
-                    f"Action: <b>{action}</b>\nRaison: {why}\nCrédibilité: {cred}"
-                )
-                broadcast(msg, fallback_chat_id)
-                seen[key] = True
+            title   = norm(e.get("title"))
+            link    = e.get("link","")
+            summary = norm(e.get("summary") or e.get("description") or "")
+            # un seul .lower() par article, partagé par detect_asset/classify_action
+            text_low = f"{title} {summary}".lower()
+            target  = group if group not in AGGREGATOR_GROUPS else detect_asset(text_low)
+
+            # Si global/exchanges/regulators sans actif détecté => on pousse quand même (info générale)
+            asset_label = target if target else group
+
+            cg_id = CG_IDS.get(target) if target else None
+            eur = usd = None
+            if cg_id:
+                px = prices.get(cg_id, {})
+                eur = px.get("eur")
+                usd = px.get("usd")
+
+            action, why = classify_action(text_low)
+            cred        = credibility(link) if group in AGGREGATOR_GROUPS else FEED_URL_CRED[url]
+            # eur peut manquer si le taux FX n'est pas disponible
+            if eur and usd:
+                price_line = f"Prix: {eur:.2f} € / ${usd:.2f}"
+            elif usd:
+                price_line = f"Prix: ${usd:.2f}"
+            else:
+                price_line = "Prix: n/a"
+
+            msg = (
+                f"📰 <b>{asset_label}</b> — {now_paris()}\n"
+                f"<b>{title}</b>\n{link}\n"
+                f"{price_line}\n\n"
+                f"Action: <b>{action}</b>\nRaison: {why}\nCrédibilité: {cred}"
+            )
+            broadcast(msg, fallback_chat_id)
+            mark_seen(seen, key)
 
 def scan_cryptopanic(seen, prices, fallback_chat_id=None):
     if not CP_TOKEN:
@@ -226,7 +472,7 @@ def scan_cryptopanic(seen, prices, fallback_chat_id=None):
     for symbol, slug in mapping.items():
         url = f"https://cryptopanic.com/api/v1/posts/?auth_token={CP_TOKEN}&currencies={slug}&public=true"
         try:
-            r = requests.get(url, timeout=20)
+            r = _api_session.get(url, timeout=20)
             if r.status_code!=200:
                 continue
             data = r.json().get("results", [])
@@ -237,7 +483,8 @@ def scan_cryptopanic(seen, prices, fallback_chat_id=None):
             uid = item.get("id")
             key = f"cp:{symbol}:{uid}"
             if key in seen:
-                continue
+                # l'API CryptoPanic renvoie du plus récent au plus ancien
+                break
             title = norm(item.get("title"))
             link  = item.get("url","")
             cg_id = CG_IDS.get(symbol)
@@ -246,8 +493,14 @@ def scan_cryptopanic(seen, prices, fallback_chat_id=None):
                 px = prices.get(cg_id, {})
                 eur = px.get("eur")
                 usd = px.get("usd")
-            action, why = classify_action(title, "")
-            price_line  = f"Prix: {eur:.2f} € / ${usd:.2f}" if (eur and usd) else "Prix: n/a"
+            action, why = classify_action(title.lower())
+            # eur peut manquer si le taux FX n'est pas disponible
+            if eur and usd:
+                price_line = f"Prix: {eur:.2f} € / ${usd:.2f}"
+            elif usd:
+                price_line = f"Prix: ${usd:.2f}"
+            else:
+                price_line = "Prix: n/a"
             msg = (
                 f"📰 <b>{symbol}</b> — {now_paris()}\n"
                 f"<b>{title}</b>\n{link}\n"
@@ -255,7 +508,7 @@ def scan_cryptopanic(seen, prices, fallback_chat_id=None):
                 f"Action: <b>{action}</b>\nRaison: {why}\nCrédibilité: Medium-High (aggregator)"
             )
             broadcast(msg, fallback_chat_id)
-            seen[key] = True
+            mark_seen(seen, key)
 
 # ================== PREDICTIONS & NIVEAUX ==================
 def check_predictions(prices, seen_targets, fallback_chat_id=None):
@@ -300,7 +553,9 @@ def check_predictions(prices, seen_targets, fallback_chat_id=None):
             seen_targets[key] = state
     save_json(SEEN_TARGETS_FILE, seen_targets)
 
-def check_user_levels(prices, fallback_chat_id=None):
+def check_user_levels(prices, seen_levels, fallback_chat_id=None):
+    # chaque niveau n'est signalé qu'une fois (sinon 288 pings/jour à 5 min par tick) ;
+    # il se ré-arme quand le prix repasse ~1% de l'autre côté (hystérésis)
     for asset, cfg in USER_ALERTS.items():
         cg = CG_IDS.get(asset)
         if not cg or cg not in prices:
@@ -310,53 +565,90 @@ def check_user_levels(prices, fallback_chat_id=None):
         if usd is None:
             continue
 
-        def ping(txt):
+        def ping(key, txt):
+            if seen_levels.get(key):
+                return
+            # eur peut manquer si le taux FX n'est pas disponible
+            price_line = f"Prix actuel: {eur:.2f} € / ${usd:.2f}" if (eur and usd) else f"Prix actuel: ${usd:.2f}"
             broadcast(
                 f"⚙️ <b>{asset}</b> — {txt} — {now_paris()}\n"
-                f"Prix actuel: {eur:.2f} € / ${usd:.2f}",
+                f"{price_line}",
                 fallback_chat_id
             )
+            seen_levels[key] = True
 
-        for lvl in cfg.get("warn_up", []):
+        # seuils pré-triés : on ne signale que le plus haut franchi (warn_up/break_even)
+        # ou le plus bas franchi (danger_down), puis on s'arrête
+        for lvl in cfg.get("warn_up", ()):
             if usd >= lvl:
-                ping(f"A atteint la zone de réduction de pertes ({lvl}$)")
-        for lvl in cfg.get("break_even", []):
+                ping(f"{asset}:warn_up:{lvl}", f"A atteint la zone de réduction de pertes ({lvl}$)")
+                break
+        for lvl in cfg.get("break_even", ()):
             if usd >= lvl:
-                ping(f"Retour à l'équilibre (~{lvl}$)")
-        for lvl in cfg.get("danger_down", []):
+                ping(f"{asset}:break_even:{lvl}", f"Retour à l'équilibre (~{lvl}$)")
+                break
+        for lvl in cfg.get("danger_down", ()):
             if usd <= lvl:
-                ping(f"⚠️ Alerte danger: sous {lvl}$")
+                ping(f"{asset}:danger_down:{lvl}", f"⚠️ Alerte danger: sous {lvl}$")
+                break
 
         bz = cfg.get("buy_zone")
         if bz and len(bz)==2:
             low, high = min(bz), max(bz)
             if low <= usd <= high:
-                ping(f"Zone d'achat ({low}$–{high}$) — attendre confirmation (bougie verte/volume)")
+                ping(f"{asset}:buy_zone:{low}-{high}",
+                     f"Zone d'achat ({low}$–{high}$) — attendre confirmation (bougie verte/volume)")
+            elif usd < low*0.99 or usd > high*1.01:
+                seen_levels[f"{asset}:buy_zone:{low}-{high}"] = False
+
+        # hystérésis : ré-armement quand le prix s'éloigne d'au moins 1% du niveau
+        for kind in ("warn_up", "break_even"):
+            for lvl in cfg.get(kind, ()):
+                key = f"{asset}:{kind}:{lvl}"
+                if seen_levels.get(key) and usd < lvl*0.99:
+                    seen_levels[key] = False
+        for lvl in cfg.get("danger_down", ()):
+            key = f"{asset}:danger_down:{lvl}"
+            if seen_levels.get(key) and usd > lvl*1.01:
+                seen_levels[key] = False
+
+    save_json(SEEN_LEVELS_FILE, seen_levels)
 
 # ================== SCHEDULER (news + prix) ==================
 def scheduler_loop():
-    seen = load_json(SEEN_ITEMS_FILE, {})
+    seen = load_seen()
     seen_targets = load_json(SEEN_TARGETS_FILE, {})
+    seen_levels  = load_json(SEEN_LEVELS_FILE, {})
     broadcast(f"✅ Bot crypto DÉMARRÉ — {now_paris()} (vérif toutes {POLL_SECONDS//60} min)")
+    _flush_batch()
 
+    tick = 0
     while True:
         prices = get_prices()
         scan_feeds(seen, prices)
         scan_cryptopanic(seen, prices)
         check_predictions(prices, seen_targets)
-        check_user_levels(prices)
-        save_json(SEEN_ITEMS_FILE, seen)
+        check_user_levels(prices, seen_levels)
+        _flush_batch()
+        tick += 1
+        if tick % SEEN_COMPACT_EVERY == 0:
+            compact_seen(seen)
         time.sleep(POLL_SECONDS)
 
 # ================== COMMANDES TELEGRAM (getUpdates) ==================
-def tg_get_updates(offset=None, timeout=25):
+# Session dédiée au long-polling : connexion TLS réutilisée entre deux getUpdates
+_updates_session = requests.Session()
+
+def tg_get_updates(offset=None, timeout=50):
+    # timeout=50 : Telegram garde la connexion ouverte jusqu'à l'arrivée d'un update,
+    # le bot est donc réellement inactif entre deux commandes (quasi 0 requête à vide)
     url = f"https://api.telegram.org/bot{TOKEN}/getUpdates"
-    params = {"timeout": timeout}
+    params = {"timeout": timeout, "allowed_updates": orjson.dumps(["message"]).decode()}
     if offset:
         params["offset"] = offset
     try:
-        r = requests.get(url, params=params, timeout=timeout+5)
-        return r.json()
+        r = _updates_session.get(url, params=params, timeout=timeout+5)
+        return orjson.loads(r.content)
     except Exception as e:
         print("getUpdates error:", e)
         return {}
@@ -370,6 +662,9 @@ def prices_snapshot_text():
         eur = px.get("eur"); usd = px.get("usd")
         if eur and usd:
             lines.append(f"• {a}: {eur:.2f} € / ${usd:.2f}")
+        elif usd:
+            # eur peut manquer si le taux FX n'est pas disponible
+            lines.append(f"• {a}: ${usd:.2f}")
         else:
             lines.append(f"• {a}: n/a")
     return "\n".join(lines)
@@ -378,26 +673,23 @@ def latest_news_text(asset_filter=None, limit_per_feed=3):
     prices = get_prices()
     lines = [f"📰 <b>News instantanées</b> — {now_paris()}"]
     # on ne marque pas seen ici (juste un pull à la demande)
-    for group, urls in FEEDS.items():
-        for url in urls:
-            try:
-                feed = feedparser.parse(url)
-            except:
+    for group, url, feed in fetch_all_feeds():
+        if feed is None:
+            continue
+        count = 0
+        for e in feed.entries[:limit_per_feed]:
+            title = norm(e.get("title"))
+            link  = e.get("link","")
+            summary = norm(e.get("summary") or e.get("description") or "")
+            target = group if group not in AGGREGATOR_GROUPS else detect_asset(f"{title} {summary}".lower())
+            label  = target if target else group
+            if asset_filter and label != asset_filter:
                 continue
-            count = 0
-            for e in feed.entries[:limit_per_feed]:
-                title = norm(e.get("title"))
-                link  = e.get("link","")
-                summary = norm(e.get("summary") or e.get("description") or "")
-                target = group if group not in ["_global","exchanges","regulators"] else detect_asset(title, summary)
-                label  = target if target else group
-                if asset_filter and label != asset_filter:
-                    continue
-                cred = credibility(link)
-                lines.append(f"• [{label}] {title} — {cred}\n  {link}")
-                count += 1
-                if count >= limit_per_feed:
-                    break
+            cred = credibility(link) if group in AGGREGATOR_GROUPS else FEED_URL_CRED[url]
+            lines.append(f"• [{label}] {title} — {cred}\n  {link}")
+            count += 1
+            if count >= limit_per_feed:
+                break
     return "\n".join(lines)
 
 def handle_command(chat_id, text):
@@ -413,9 +705,11 @@ def handle_command(chat_id, text):
         msg = ["🔔 <b>Niveaux surveillés</b>"]
         for a, cfg in USER_ALERTS.items():
             parts = []
-            if cfg.get("warn_up"):     parts.append(f"warn_up: {cfg['warn_up']}")
-            if cfg.get("break_even"):  parts.append(f"break_even: {cfg['break_even']}")
-            if cfg.get("danger_down"): parts.append(f"danger: {cfg['danger_down']}")
+            # sorted(...) : ces seuils sont des tuples pré-triés en interne,
+            # on les réaffiche en liste croissante comme avant
+            if cfg.get("warn_up"):     parts.append(f"warn_up: {sorted(cfg['warn_up'])}")
+            if cfg.get("break_even"):  parts.append(f"break_even: {sorted(cfg['break_even'])}")
+            if cfg.get("danger_down"): parts.append(f"danger: {sorted(cfg['danger_down'])}")
             if cfg.get("buy_zone"):    parts.append(f"buy_zone: {cfg['buy_zone']}")
             if cfg.get("tp_zone"):     parts.append(f"tp_zone: {cfg['tp_zone']}")
             msg.append(f"• {a}: " + " | ".join(parts))
@@ -440,7 +734,7 @@ def commands_loop():
     state = load_json(LAST_UPDATE_ID_FILE, {"offset": None})
     offset = state.get("offset")
     while True:
-        data = tg_get_updates(offset=offset, timeout=25)
+        data = tg_get_updates(offset=offset)
         if not data or not data.get("ok"):
             time.sleep(2)
             continue